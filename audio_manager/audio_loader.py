@@ -0,0 +1,14 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+class AudioLoader(QThread):
+    loaded = pyqtSignal(bool, str)  # success, error message
+
+    def __init__(self, audio_player, file_path):
+        super().__init__()
+        self.audio_player = audio_player
+        self.file_path = file_path
+
+    def run(self):
+        # Opening a file can mean scanning a long mp3; keep it off the GUI thread
+        success, error = self.audio_player.load_file(self.file_path)
+        self.loaded.emit(success, error)
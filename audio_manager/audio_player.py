@@ -1,28 +1,172 @@
 import soundfile as sf
 import sounddevice as sd
 import numpy as np
+import soxr
+from numba import njit
+import queue
 import threading
 import atexit
 from typing import Tuple, Optional
 
+# Minimum seconds of audio the disk reader keeps decoded ahead of the callback
+RING_SECONDS = 2
+# Frames decoded per read from disk
+READ_FRAMES = 4096
+
+
+@njit('void(float32[:, ::1], float32[:, ::1], int64, int64, float32)',
+      cache=True, fastmath=True, boundscheck=False, nogil=True)
+def mix(out, src, pos, n, vol):
+    """Write ``n`` stereo frames of ``src`` from ``pos``, scaled by ``vol``, to ``out``."""
+    for i in range(n):
+        out[i, 0] = src[pos + i, 0] * vol
+        out[i, 1] = src[pos + i, 1] * vol
+
+
+class DiskReader(threading.Thread):
+    """
+    Producer thread streaming an audio file into a ring buffer.
+
+    The reader owns the SoundFile handle and the write side of the ring; the
+    audio callback owns ``consumed``. Both counters only ever grow, so the
+    ring never confuses full with empty. Everything the callback needs is
+    published as a single ``state`` tuple so it always sees a consistent
+    snapshot without taking a lock.
+    """
+
+    def __init__(self, file_path: str, samplerate: Optional[float] = None):
+        super().__init__(daemon=True)
+        self._sf = sf.SoundFile(file_path)
+        channels = min(self._sf.channels, 2)
+
+        # Audio is resampled here, off the realtime thread, whenever the
+        # output stream runs at a different rate than the file
+        self.samplerate: int = int(samplerate or self._sf.samplerate)
+        self._ratio = self.samplerate / self._sf.samplerate
+        self._resampler: Optional[soxr.ResampleStream] = None
+        self._headroom = 0
+        if self.samplerate != self._sf.samplerate:
+            self._resampler = soxr.ResampleStream(
+                self._sf.samplerate, self.samplerate, channels,
+                dtype='float32', quality='HQ')
+            # Room for rounding and the flush of the resampler's delay line
+            self._headroom = READ_FRAMES
+        self.frames: int = int(self._sf.frames * self._ratio)
+
+        # A power-of-two ring lets both sides index it with a mask
+        self.capacity = 1 << (int(self.samplerate * RING_SECONDS) - 1).bit_length()
+        self.mask = self.capacity - 1
+        self.ring = np.zeros((self.capacity, 2), dtype=np.float32)
+        self._scratch = np.empty((READ_FRAMES, self._sf.channels), dtype=np.float32)
+
+        # Frames taken out of the ring so far (written by the callback only)
+        self.consumed: int = 0
+        # (generation, ring start, frame at start, frames written, eof)
+        self.state: Tuple[int, int, int, int, bool] = (0, 0, 0, 0, False)
+
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+
+    def seek(self, frame: int):
+        """
+        Ask the reader to continue from another position.
+
+        Args:
+            frame (int): Frame, at the output samplerate, to continue from
+        """
+        self._requests.put(frame)
+
+    def close(self):
+        """Stop the reader; the file handle is closed by the thread itself."""
+        self._closed = True
+
+    def _push(self, block: np.ndarray, written: int) -> int:
+        """Copy block into the ring after ``written`` frames, wrapping at the end."""
+        index = written & self.mask
+        first = min(len(block), self.capacity - index)
+        # Mono is broadcast to both channels
+        self.ring[index:index + first] = block[:first]
+        self.ring[:len(block) - first] = block[first:]
+        return written + len(block)
+
+    def run(self):
+        generation, start, frame, written, eof = self.state
+        try:
+            while not self._closed:
+                free = self.capacity - (written - self.consumed)
+                count = min(READ_FRAMES, int((free - self._headroom) / self._ratio))
+                if eof or count <= 0:
+                    # Nothing to read until the callback catches up or we seek.
+                    # Right after a seek the ring only looks full until the
+                    # callback moves on to the new generation, so check back
+                    # often rather than leave it short of audio for a timeout.
+                    try:
+                        target = self._requests.get(
+                            timeout=0.001 if self.consumed < start else 0.01)
+                    except queue.Empty:
+                        continue
+                else:
+                    try:
+                        target = self._requests.get_nowait()
+                    except queue.Empty:
+                        target = None
+
+                if target is not None:
+                    # Whatever is buffered now is stale; the callback skips
+                    # to ``start`` once it sees the new generation
+                    self._sf.seek(min(round(target / self._ratio), self._sf.frames))
+                    if self._resampler is not None:
+                        self._resampler.clear()
+                    generation += 1
+                    start, frame, eof = written, target, False
+                    self.state = (generation, start, frame, written, eof)
+                    continue
+
+                block = self._sf.read(out=self._scratch[:count])
+                eof = len(block) < count
+
+                # Extra channels beyond stereo are dropped
+                block = block[:, :2]
+                if self._resampler is not None:
+                    block = self._resampler.resample_chunk(
+                        np.ascontiguousarray(block), last=eof)
+
+                written = self._push(block, written)
+                self.state = (generation, start, frame, written, eof)
+        except Exception as e:
+            print(f"Error reading audio file: {str(e)}")
+            self.state = (generation, start, frame, written, True)
+        finally:
+            self._sf.close()
+            self._resampler = None
+
+
 class AudioPlayer:
     def __init__(self):
         """Initialize the audio player with necessary components."""
-        # State variables
+        # State variables (UI thread)
         self.current_file: Optional[str] = None
-        self.data: Optional[np.ndarray] = None
         self.samplerate: Optional[int] = None
-        self.position: int = 0
-        self.playing: bool = False
-        self.volume: float = 1.0
-        
-        # Threading
-        self.lock = threading.Lock()
-        
+        self.frames: int = 0
+        self.duration: float = 0
+        self._reader: Optional[DiskReader] = None
+
+        # Callback-owned state, only ever written from the audio thread
+        self._source: Optional[DiskReader] = None
+        self._generation: int = -1
+        self._pos: int = 0
+        self._vol: float = 1.0
+        self._playing: bool = False
+
+        # Commands published by the UI thread and drained by the callback,
+        # so the realtime path never has to take a lock
+        self._cmds: queue.SimpleQueue = queue.SimpleQueue()
+
         # Initialize audio stream
         try:
             self.stream = sd.OutputStream(
                 channels=2,
+                dtype='float32',
                 callback=self.callback,
                 finished_callback=self.finished_callback
             )
@@ -30,142 +174,182 @@ class AudioPlayer:
         except Exception as e:
             print(f"Error initializing audio stream: {str(e)}")
             self.stream = None
-        
+
         # Register cleanup
         atexit.register(self.cleanup)
-    
+
     def load_file(self, file_path: str) -> Tuple[bool, str]:
         """
         Load an audio file for playback.
-        
+
         Args:
             file_path (str): Path to the audio file
-            
+
         Returns:
             Tuple[bool, str]: (Success status, Error message if any)
         """
-        with self.lock:
-            try:
-                # Load the audio file
-                self.data, self.samplerate = sf.read(file_path)
-                
-                # Convert mono to stereo if needed
-                if len(self.data.shape) == 1:
-                    self.data = np.column_stack((self.data, self.data))
-                
-                self.current_file = file_path
-                self.position = 0
-                return True, ""
-            except Exception as e:
-                self.data = None
-                self.samplerate = None
-                self.current_file = None
-                self.position = 0
-                return False, str(e)
-    
+        self._close_reader()
+        try:
+            # Only the header is read here; samples stream in on the reader thread
+            reader = DiskReader(file_path, self.stream.samplerate if self.stream else None)
+            reader.start()
+
+            self._reader = reader
+            self.current_file = file_path
+            self.samplerate = reader.samplerate
+            self.frames = reader.frames
+            self.duration = reader.frames / reader.samplerate
+            self._cmds.put(('load', reader))
+            return True, ""
+        except Exception as e:
+            self.current_file = None
+            self.samplerate = None
+            self.frames = 0
+            self.duration = 0
+            self._cmds.put(('load', None))
+            return False, str(e)
+
     def play(self):
         """Start or resume playback."""
-        with self.lock:
-            if self.data is not None:
-                self.playing = True
-    
+        if self.current_file is not None:
+            self._cmds.put(('play', True))
+
     def pause(self):
         """Pause playback."""
-        with self.lock:
-            self.playing = False
-    
+        self._cmds.put(('play', False))
+
     def stop(self):
         """Stop playback and reset position."""
-        with self.lock:
-            self.playing = False
-            self.position = 0
-    
+        self._cmds.put(('play', False))
+        if self._reader is not None:
+            self._reader.seek(0)
+
     def seek(self, position_seconds: float):
         """
         Seek to a specific position in the audio file.
-        
+
         Args:
             position_seconds (float): Position in seconds to seek to
         """
-        with self.lock:
-            if self.data is not None and self.samplerate is not None:
-                self.position = int(position_seconds * self.samplerate)
-                self.position = min(self.position, len(self.data))
-    
+        if self._reader is not None and self.samplerate is not None:
+            position = int(position_seconds * self.samplerate)
+            self._reader.seek(max(0, min(position, self.frames)))
+
     def get_position(self) -> float:
         """
         Get current playback position in seconds.
-        
+
         Returns:
             float: Current position in seconds
         """
-        with self.lock:
-            if self.samplerate is not None:
-                return self.position / self.samplerate
-            return 0
-    
+        if self.samplerate is not None:
+            return self._pos / self.samplerate
+        return 0
+
     def get_duration(self) -> float:
         """
         Get total duration of loaded audio in seconds.
-        
+
         Returns:
             float: Duration in seconds
         """
-        with self.lock:
-            if self.data is not None and self.samplerate is not None:
-                return len(self.data) / self.samplerate
-            return 0
-    
+        return self.duration
+
     def set_volume(self, volume: float):
         """
         Set playback volume.
-        
+
         Args:
             volume (float): Volume level between 0 and 1
         """
-        with self.lock:
-            self.volume = max(0.0, min(1.0, volume))
-    
-    def callback(self, outdata: np.ndarray, frames: int, 
+        self._cmds.put(('vol', max(0.0, min(1.0, volume))))
+
+    def _apply_commands(self):
+        """Drain pending UI commands without blocking (audio thread only)."""
+        try:
+            while True:
+                cmd, value = self._cmds.get_nowait()
+                if cmd == 'play':
+                    self._playing = value and self._source is not None
+                elif cmd == 'vol':
+                    self._vol = value
+                elif cmd == 'load':
+                    self._source = value
+                    self._generation = -1
+                    self._pos = 0
+                    if value is None:
+                        self._playing = False
+        except queue.Empty:
+            pass
+
+    def callback(self, outdata: np.ndarray, frames: int,
                 time: float, status: sd.CallbackFlags):
         """
         Audio stream callback function.
-        
+
         Args:
             outdata (np.ndarray): Output buffer to fill with audio data
             frames (int): Number of frames to process
             time (float): Timestamp
             status (sd.CallbackFlags): Status flags
         """
-        with self.lock:
-            if self.data is None or not self.playing:
-                outdata.fill(0)
-                return
-            
-            if self.position >= len(self.data):
-                self.playing = False
-                outdata.fill(0)
-                return
-            
-            # Calculate how many frames we can write
-            remaining = len(self.data) - self.position
-            valid_frames = min(frames, remaining)
-            
-            # Apply volume and write to output buffer
-            output_data = self.data[self.position:self.position + valid_frames] * self.volume
-            outdata[:valid_frames] = output_data
-            
-            if valid_frames < frames:
-                outdata[valid_frames:] = 0
-            
-            self.position += valid_frames
-    
+        self._apply_commands()
+
+        source = self._source
+        if source is None:
+            outdata.fill(0)
+            return
+
+        generation, start, frame, written, eof = source.state
+        if generation != self._generation:
+            # A seek finished: drop what was buffered before it
+            self._generation = generation
+            source.consumed = start
+            self._pos = frame
+
+        if not self._playing:
+            outdata.fill(0)
+            return
+
+        consumed = source.consumed
+        available = written - consumed
+        if available <= 0:
+            # Either the reader fell behind or the file is done
+            if eof:
+                self._playing = False
+            outdata.fill(0)
+            return
+
+        # Calculate how many frames we can write
+        valid_frames = min(frames, available)
+
+        # Apply volume straight into the output buffer, in two pieces
+        # when the block wraps around the end of the ring
+        ring = source.ring
+        index = consumed & source.mask
+        first = min(valid_frames, source.capacity - index)
+        mix(outdata, ring, index, first, self._vol)
+        if first < valid_frames:
+            mix(outdata[first:], ring, 0, valid_frames - first, self._vol)
+
+        # Only the tail past the buffered audio needs silencing
+        if valid_frames < frames:
+            outdata[valid_frames:].fill(0)
+
+        source.consumed = consumed + valid_frames
+        self._pos = frame + source.consumed - start
+
     def finished_callback(self):
         """Handle playback completion."""
-        with self.lock:
-            self.playing = False
-            self.position = 0
-    
+        self._playing = False
+        self._pos = 0
+
+    def _close_reader(self):
+        """Stop the disk reader of the current file, if any."""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
     def cleanup(self):
         """Clean up resources when the player is shut down."""
         try:
@@ -173,35 +357,33 @@ class AudioPlayer:
                 self.stream.stop()
                 self.stream.close()
                 self.stream = None
-            
-            if hasattr(self, 'lock'):
-                self.lock = None
-            
+
             # Clear audio data
-            self.data = None
+            self._close_reader()
+            self._source = None
             self.samplerate = None
             self.current_file = None
-            self.position = 0
-            self.playing = False
+            self.frames = 0
+            self.duration = 0
+            self._pos = 0
+            self._playing = False
         except Exception as e:
             print(f"Error during audio player cleanup: {str(e)}")
 
     def is_playing(self) -> bool:
         """
         Check if audio is currently playing.
-        
+
         Returns:
             bool: True if audio is playing, False otherwise
         """
-        with self.lock:
-            return self.playing
-    
+        return self._playing
+
     def get_current_file(self) -> Optional[str]:
         """
         Get the path of currently loaded audio file.
-        
+
         Returns:
             Optional[str]: Path to current audio file or None if no file is loaded
         """
-        with self.lock:
-            return self.current_file
\ No newline at end of file
+        return self.current_file
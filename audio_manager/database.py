@@ -1,5 +1,6 @@
 import sqlite3
 import threading
+import hashlib
 from datetime import datetime
 import os  # Add this import here
 import atexit  # Add this for cleanup
@@ -7,62 +8,138 @@ import atexit  # Add this for cleanup
 class Database:
     def __init__(self, db_path='transcriptions.db'):
         self.db_path = db_path
-        self.mutex = threading.Lock()
+        self._local = threading.local()
         self.setup_database()
         
         # Register cleanup function
         atexit.register(self.cleanup)
     
+    def _conn(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # In WAL mode readers never block; a second writer waits for
+            # the first instead of failing with "database is locked"
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-65536')
+            conn.execute('PRAGMA mmap_size=268435456')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+        return conn
+    
     def setup_database(self):
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._conn()
+        # WAL is stored in the database file, so this only has to happen once
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS transcriptions (
                     file_path TEXT PRIMARY KEY,
                     transcript TEXT,
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                     last_modified DATETIME,
-                    status TEXT DEFAULT 'pending'
+                    status TEXT DEFAULT 'pending',
+                    content_hash BLOB
                 )
             ''')
+            
+            # Older databases were created without the transcript hash
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(transcriptions)')}
+            if 'content_hash' not in columns:
+                conn.execute('ALTER TABLE transcriptions ADD COLUMN content_hash BLOB')
+            
+            # The full-text index reads transcripts from the table itself
+            # rather than keeping a second copy, and indexes trigrams so any
+            # substring can be found. Older databases have a word index, or
+            # before that a one-row-per-word table; either is replaced and
+            # rebuilt from the transcripts once.
+            fts = conn.execute('''
+                SELECT sql FROM sqlite_master 
+                WHERE type = 'table' AND name = 'transcriptions_fts'
+            ''').fetchone()
+            if fts is None or 'trigram' not in fts[0]:
+                conn.execute('DROP TABLE IF EXISTS transcriptions_fts')
+                conn.execute('''
+                    CREATE VIRTUAL TABLE transcriptions_fts USING fts5(
+                        file_path UNINDEXED,
+                        transcript,
+                        content='transcriptions',
+                        tokenize='trigram'
+                    )
+                ''')
+                conn.execute('''
+                    INSERT INTO transcriptions_fts (transcriptions_fts) 
+                    VALUES ('rebuild')
+                ''')
+            conn.execute('DROP TABLE IF EXISTS search_index')
+            
+            # Keep the index in step with every change to a transcript
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS search_index (
-                    file_path TEXT,
-                    word TEXT,
-                    position INTEGER,
-                    FOREIGN KEY(file_path) REFERENCES transcriptions(file_path)
-                )
+                CREATE TRIGGER IF NOT EXISTS transcriptions_ai 
+                AFTER INSERT ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts (rowid, file_path, transcript) 
+                    VALUES (new.rowid, new.file_path, new.transcript);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS transcriptions_ad 
+                AFTER DELETE ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts 
+                    (transcriptions_fts, rowid, file_path, transcript) 
+                    VALUES ('delete', old.rowid, old.file_path, old.transcript);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS transcriptions_au 
+                AFTER UPDATE OF file_path, transcript ON transcriptions BEGIN
+                    INSERT INTO transcriptions_fts 
+                    (transcriptions_fts, rowid, file_path, transcript) 
+                    VALUES ('delete', old.rowid, old.file_path, old.transcript);
+                    INSERT INTO transcriptions_fts (rowid, file_path, transcript) 
+                    VALUES (new.rowid, new.file_path, new.transcript);
+                END
             ''')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_word ON search_index(word)')
     
     def add_transcription(self, file_path, transcript):
+        content_hash = hashlib.sha1(transcript.encode('utf-8')).digest()
         try:
-            with self.mutex, sqlite3.connect(self.db_path) as conn:
+            with self._conn() as conn:
                 # Get file modification time
                 mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                 
-                conn.execute('''
-                    INSERT OR REPLACE INTO transcriptions 
-                    (file_path, transcript, last_modified, status) 
-                    VALUES (?, ?, ?, ?)
-                ''', (file_path, transcript, mod_time, 'completed'))
-                
-                # Update search index
-                conn.execute('DELETE FROM search_index WHERE file_path = ?', 
-                           (file_path,))
-                words = transcript.lower().split()
-                conn.executemany('''
-                    INSERT INTO search_index (file_path, word, position) 
-                    VALUES (?, ?, ?)
-                ''', [(file_path, word, pos) for pos, word in enumerate(words)])
+                # Same text as before: don't touch the transcript, so the
+                # search index is left alone
+                existing = conn.execute('''
+                    SELECT content_hash FROM transcriptions 
+                    WHERE file_path = ? AND status = 'completed'
+                ''', (file_path,)).fetchone()
+                if existing and existing[0] == content_hash:
+                    conn.execute('''
+                        UPDATE transcriptions SET last_modified = ? 
+                        WHERE file_path = ?
+                    ''', (mod_time, file_path))
+                    return
                 
-                conn.commit()
+                conn.execute('''
+                    INSERT INTO transcriptions 
+                    (file_path, transcript, last_modified, status, content_hash) 
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(file_path) DO UPDATE SET 
+                        transcript = excluded.transcript,
+                        timestamp = CURRENT_TIMESTAMP,
+                        last_modified = excluded.last_modified,
+                        status = excluded.status,
+                        content_hash = excluded.content_hash
+                ''', (file_path, transcript, mod_time, 'completed', content_hash))
         except Exception as e:
             print(f"Error adding transcription: {str(e)}")
             raise
     
     def get_transcription(self, file_path):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conn() as conn:
                 result = conn.execute('''
                     SELECT transcript FROM transcriptions 
                     WHERE file_path = ? AND status = 'completed'
@@ -72,16 +149,52 @@ class Database:
             print(f"Error getting transcription: {str(e)}")
             return None
 
-    def search_transcripts(self, query):
+    def get_completed_paths(self, directory=None):
+        """Return the set of file paths that have a completed transcription"""
+        try:
+            with self._conn() as conn:
+                if directory is None:
+                    rows = conn.execute('''
+                        SELECT file_path FROM transcriptions 
+                        WHERE status = 'completed'
+                    ''')
+                else:
+                    # Paths under directory sort between "dir/" and "dir0" (the
+                    # character after the separator), so the primary key index
+                    # can answer this without visiting other directories
+                    prefix = os.path.join(directory, '')
+                    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                    rows = conn.execute('''
+                        SELECT file_path FROM transcriptions 
+                        WHERE file_path >= ? AND file_path < ? AND status = 'completed'
+                    ''', (prefix, upper))
+                return {row[0] for row in rows}
+        except Exception as e:
+            print(f"Error getting completed paths: {str(e)}")
+            return set()
+
+    def search_transcripts(self, query, limit=200):
+        """Find the best limit transcripts containing query, ignoring case"""
+        # Trigrams can't match fewer than three characters
+        query = query.strip()
+        if len(query) < 3:
+            return []
+        
+        # One quoted phrase: the query is matched as a substring and is
+        # never parsed as FTS5 syntax. Snippet sizes count trigrams, which
+        # are about one character each.
+        phrase = '"{}"'.format(query.replace('"', '""'))
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conn() as conn:
                 return conn.execute('''
-                    SELECT DISTINCT t.file_path, t.transcript 
-                    FROM transcriptions t
-                    JOIN search_index si ON t.file_path = si.file_path
-                    WHERE si.word LIKE ? AND t.status = 'completed'
-                    ORDER BY t.timestamp DESC
-                ''', (f'%{query.lower()}%',)).fetchall()
+                    SELECT file_path, 
+                           snippet(transcriptions_fts, 1, '', '', '...', 64) 
+                    FROM transcriptions_fts
+                    WHERE transcriptions_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ''', (phrase, limit)).fetchall()
         except Exception as e:
             print(f"Error searching transcripts: {str(e)}")
             return []
@@ -89,7 +202,9 @@ class Database:
     def cleanup(self):
         """Cleanup resources on shutdown"""
         try:
-            if hasattr(self, 'mutex'):
-                self.mutex = None
+            conn = getattr(self._local, 'conn', None)
+            if conn is not None:
+                conn.close()
+                self._local.conn = None
         except Exception as e:
             print(f"Error during cleanup: {str(e)}")
\ No newline at end of file
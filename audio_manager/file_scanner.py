@@ -0,0 +1,20 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from audio_manager.utils.file_utils import get_audio_files
+
+class FileScanner(QThread):
+    scanned = pyqtSignal(str, object, set)  # directory, AudioIndex, transcribed paths
+
+    def __init__(self, db, directory):
+        super().__init__()
+        self.db = db
+        self.directory = directory
+
+    def run(self):
+        try:
+            # Directory listing and DB lookup stay off the GUI thread
+            audio_files = get_audio_files(self.directory)
+            completed = self.db.get_completed_paths(self.directory)
+            self.scanned.emit(self.directory, audio_files, completed)
+        except Exception as e:
+            print(f"Error scanning audio files: {str(e)}")
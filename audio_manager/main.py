@@ -7,7 +7,6 @@ from PyQt6.QtCore import Qt, QTimer, QFileSystemWatcher, QSettings, QThread
 from PyQt6.QtGui import QAction
 from datetime import timedelta
 from pathlib import Path
-import whisper
 import os
 
 # Change relative imports to absolute imports
@@ -17,12 +16,7 @@ from audio_manager.transcription import TranscriptionWorker
 from audio_manager.utils.file_utils import get_audio_files
 
 def main():
-    # Enable high DPI scaling
-    if hasattr(Qt, 'AA_EnableHighDpiScaling'):
-        QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
-    if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
-        QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
-    
+    # High DPI scaling is always on in Qt 6
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     app.setStyleSheet(MAIN_STYLE)
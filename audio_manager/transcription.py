@@ -1,30 +1,155 @@
 from PyQt6.QtCore import QThread, pyqtSignal
-import whisper
+import soundfile as sf
+import numpy as np
+import threading
+import os
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """Return the Whisper model shared by all windows, loading it on first use"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            # Imported here so CTranslate2 loads on the model thread, not at startup
+            import ctranslate2
+            from faster_whisper import WhisperModel
+            
+            # CTranslate2 keeps its converted weights in the local model cache,
+            # so only the first launch downloads anything
+            if ctranslate2.get_cuda_device_count() > 0:
+                # Int8 weights with FP16 activations use the tensor cores
+                model = WhisperModel("base", device="cuda", compute_type="int8_float16")
+            else:
+                # Half the cores are left free for playback and the UI
+                model = WhisperModel("base", device="cpu", compute_type="int8",
+                                     cpu_threads=max(1, (os.cpu_count() or 2) // 2))
+            
+            # One pass over a second of silence sets up the buffers (and on
+            # CUDA the kernels) now rather than on the first real file
+            segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32))
+            for _ in segments:
+                pass
+            _model = model
+        return _model
 
 class TranscriptionWorker(QThread):
     finished = pyqtSignal(str, str)  # file_path, transcript
     error = pyqtSignal(str)
     progress = pyqtSignal(int)
+    file_started = pyqtSignal(int, int)  # file number, queue length
+    done = pyqtSignal(int)  # number of files that failed
 
-    def __init__(self, model, file_path):
+    def __init__(self, model, db, file_paths, batch_size=8):
         super().__init__()
         self.model = model
-        self.file_path = file_path
+        self.db = db
+        self.file_paths = list(file_paths)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._accepting = True
+        
+        # Progress shown so far, and the (shown, work) point the rest of the
+        # bar is measured from; moved whenever the queue grows
+        self._shown = 0
+        self._work = 0
+        self._count = None
+        self._base = (0, 0)
+
+    def add_files(self, file_paths):
+        """
+        Queue more files behind the ones already being transcribed.
+
+        Returns:
+            bool: False if the worker has already run out of files
+        """
+        with self._lock:
+            if not self._accepting:
+                return False
+            self.file_paths.extend(file_paths)
+            return True
+
+    def _next_file(self, index):
+        """Return (file_path, queue length), closing the queue once it's empty"""
+        with self._lock:
+            if index < len(self.file_paths):
+                return self.file_paths[index], len(self.file_paths)
+            self._accepting = False
+            return None, index
+
+    def _report(self, work):
+        """Emit overall progress, work being in percent of a file over the queue"""
+        with self._lock:
+            count = len(self.file_paths)
+        if count != self._count:
+            # Files joined the queue: spread what is left of the bar over
+            # the new total so it never moves backwards
+            self._count = count
+            self._base = (self._shown, self._work)
+        self._work = work
+        
+        shown, base = self._base
+        value = shown + (100 - shown) * (work - base) // (count * 100 - base)
+        if value > self._shown:
+            self._shown = value
+            self.progress.emit(value)
 
     def run(self):
-        try:
-            # Emit initial progress
-            self.progress.emit(10)
-            
-            # Load audio
-            self.progress.emit(30)
-            
-            # Perform transcription
-            result = self.model.transcribe(self.file_path)
-            
-            # Complete
-            self.progress.emit(100)
+        # Silero VAD cuts silence out before it reaches the encoder. The
+        # batched pipeline then runs the speech pieces through the encoder
+        # batch_size at a time; 1 keeps the sequential decoder.
+        options = {'vad_filter': True}
+        if self.batch_size > 1:
+            from faster_whisper import BatchedInferencePipeline
+            pipeline = BatchedInferencePipeline(model=self.model)
+            options['batch_size'] = self.batch_size
+        else:
+            pipeline = self.model
+        
+        # Queued files go through the same pipeline one after another, with
+        # the progress bar covering all of them
+        index = failed = 0
+        while True:
+            file_path, count = self._next_file(index)
+            if file_path is None:
+                break
+            self.file_started.emit(index + 1, count)
+            try:
+                self.transcribe(pipeline, options, file_path, index)
+            except Exception as e:
+                failed += 1
+                self.error.emit(str(e))
+            index += 1
+        self.done.emit(failed)
+
+    def transcribe(self, pipeline, options, file_path, index):
+        # Emit initial progress
+        percent = 10
+        self._report(index * 100 + percent)
+        
+        # Segments are decoded lazily as the generator is consumed,
+        # which lets progress follow the actual transcription
+        segments, info = pipeline.transcribe(file_path, **options)
+        duration = info.duration or sf.info(file_path).duration
+        parts = []
+        for segment in segments:
+            parts.append(segment.text)
             
-            self.finished.emit(self.file_path, result["text"])
-        except Exception as e:
-            self.error.emit(str(e))
\ No newline at end of file
+            # Only signal the UI when the bar actually moves; 100 is
+            # kept for when the text is complete
+            if duration:
+                done = min(99, int(100 * segment.end / duration))
+                if done > percent:
+                    percent = done
+                    self._report(index * 100 + percent)
+        
+        transcript = "".join(parts).strip()
+        
+        # Stored from here so the GUI thread never waits on the write
+        self.db.add_transcription(file_path, transcript)
+        
+        # Complete
+        self._report((index + 1) * 100)
+        
+        self.finished.emit(file_path, transcript)
@@ -3,17 +3,25 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QLabel, QFileDialog, QProgressBar, QSplitter, 
                            QMessageBox, QMenu, QSlider, QLineEdit, QToolBar,
                            QStatusBar)
-from PyQt6.QtCore import Qt, QTimer, QFileSystemWatcher, QSettings, QThread
+from PyQt6.QtCore import (Qt, QTimer, QElapsedTimer, QFileSystemWatcher, QSettings,
+                          QThread)
 from PyQt6.QtGui import QAction
-from datetime import timedelta
 from pathlib import Path
-import whisper
+from itertools import chain, islice
 import os
 
 from audio_manager.database import Database
 from audio_manager.audio_player import AudioPlayer
-from audio_manager.transcription import TranscriptionWorker
-from audio_manager.utils.file_utils import get_audio_files
+from audio_manager.audio_loader import AudioLoader
+from audio_manager.transcription import TranscriptionWorker, get_model
+from audio_manager.file_scanner import FileScanner
+
+# Item data role holding the key that keeps tree siblings newest first
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+# Files added to the tree per event loop iteration
+TREE_CHUNK = 500
+# Longest a rescan is held back while the directory keeps changing, in ms
+WATCH_MAX_WAIT = 5000
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -31,18 +39,43 @@ class MainWindow(QMainWindow):
         self.is_playing = False
         self.directory = None
         self.current_transcription = None
+        self.duration_str = self.format_time(0)
+        self.shown_time = None
+        self.file_scanner = None
+        self.rescan_pending = False
+        self.audio_loader = None
+        
+        # Items currently in the file tree, so rescans only apply the changes
+        self.tree_directory = None
+        self.file_items = {}
+        self.year_items = {}
+        self.month_items = {}
+        self.day_items = {}
+        self.pending_rows = None
+        self.pending_completed = set()
+        self.populate_scheduled = False
+        # Top level tree items set aside while search results are shown, and
+        # the nodes that were expanded, which the view forgets meanwhile
+        self.stashed_items = None
+        self.stashed_expanded = []
         
         # Setup UI first
         self.setup_ui()
         
-        # File watcher setup
+        # File watcher setup; a burst of changes (e.g. a copy of many
+        # files) is coalesced into a single rescan once it settles
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(500)
+        self.watch_timer.timeout.connect(self.refresh_files)
+        self.watch_elapsed = QElapsedTimer()
         self.file_watcher = QFileSystemWatcher()
-        self.file_watcher.directoryChanged.connect(self.refresh_files)
+        self.file_watcher.directoryChanged.connect(self.queue_refresh)
         
-        # Add position update timer
+        # Add position update timer, only running while audio plays
         self.position_timer = QTimer()
+        self.position_timer.setInterval(100)
         self.position_timer.timeout.connect(self.update_position)
-        self.position_timer.start(100)
         
         # Load whisper model
         self.statusBar().showMessage("Loading Whisper model...")
@@ -53,11 +86,6 @@ class MainWindow(QMainWindow):
         
         # Restore previous session
         self.restore_settings()
-        
-        # Setup auto-refresh timer
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_files)
-        self.refresh_timer.start(30000)  # Refresh every 30 seconds
     
     # UI Event Handlers
     def on_item_selected(self, item):
@@ -109,9 +137,15 @@ class MainWindow(QMainWindow):
         # Add search bar
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search transcriptions...")
-        self.search_bar.textChanged.connect(self.search_transcripts)
+        self.search_bar.textChanged.connect(self.queue_search)
         toolbar.addWidget(self.search_bar)
         
+        # Only search once typing pauses instead of on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        
         # Create splitter for main content
         splitter = QSplitter(Qt.Orientation.Horizontal)
         layout.addWidget(splitter)
@@ -122,6 +156,7 @@ class MainWindow(QMainWindow):
         
         self.tree = QTreeWidget()
         self.tree.setHeaderLabels(["Files", "Time"])
+        self.tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
         self.tree.itemClicked.connect(self.on_item_selected)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
@@ -144,7 +179,7 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(self.stop_button)
         
         # Add time labels and seeking slider
-        self.time_label = QLabel("0:00 / 0:00")
+        self.time_label = QLabel(f"{self.format_time(0)} / {self.duration_str}")
         controls_layout.addWidget(self.time_label)
         
         self.seek_slider = QSlider(Qt.Orientation.Horizontal)
@@ -206,21 +241,47 @@ class MainWindow(QMainWindow):
             if not file_path:
                 return
             
-            success, error = self.audio_player.load_file(file_path)
-            if not success:
-                QMessageBox.critical(self, "Error", f"Could not load audio file: {error}")
-                return
+            # Load in the background and start playing once it is ready
+            self.play_button.setEnabled(False)
+            self.audio_loader = AudioLoader(self.audio_player, file_path)
+            self.audio_loader.loaded.connect(self.on_audio_loaded)
+            self.audio_loader.start()
+            return
         
-        if self.audio_player.playing:
+        self.toggle_playback()
+
+    def on_audio_loaded(self, success, error):
+        """Handle a file finishing loading in the background"""
+        self.play_button.setEnabled(True)
+        if not success:
+            QMessageBox.critical(self, "Error", f"Could not load audio file: {error}")
+            return
+        
+        # The duration only changes when another file is loaded
+        self.duration_str = self.format_time(self.audio_player.get_duration())
+        self.toggle_playback()
+
+    def toggle_playback(self):
+        """Pause if playing, otherwise play the loaded file"""
+        if self.audio_player.is_playing():
             self.audio_player.pause()
+            self.position_timer.stop()
             self.play_button.setText("Play")
         else:
             self.audio_player.play()
+            self.position_timer.start()
             self.play_button.setText("Pause")
 
     def stop_audio(self):
         """Stop audio playback"""
         self.audio_player.stop()
+        self.position_timer.stop()
+        self.show_position(0)
+        self.play_button.setText("Play")
+
+    def on_file_finished(self):
+        """Handle playback reaching the end of the file"""
+        self.position_timer.stop()
         self.play_button.setText("Play")
 
     def set_volume(self, value):
@@ -229,20 +290,32 @@ class MainWindow(QMainWindow):
 
     def format_time(self, seconds):
         """Convert seconds to MM:SS format"""
-        return str(timedelta(seconds=int(seconds)))[2:7]
+        minutes, seconds = divmod(int(seconds), 60)
+        return f"{minutes:02d}:{seconds:02d}"
 
     def update_position(self):
         """Update time label and slider position"""
-        if self.audio_player.current_file:
-            position = self.audio_player.get_position()
-            duration = self.audio_player.get_duration()
-            
-            position_str = self.format_time(position)
-            duration_str = self.format_time(duration)
-            self.time_label.setText(f"{position_str} / {duration_str}")
-            
-            if not self.seek_slider.isSliderDown():
-                self.seek_slider.setValue(int(position * 1000 / duration) if duration else 0)
+        if not self.audio_player.current_file:
+            return
+        
+        self.show_position(self.audio_player.get_position())
+        
+        # The player stops by itself once it runs off the end of the file
+        if not self.audio_player.is_playing():
+            self.on_file_finished()
+
+    def show_position(self, position):
+        """Show position (in seconds) in the time label and slider"""
+        duration = self.audio_player.get_duration()
+        
+        # The label only changes once a second; skip formatting it otherwise
+        shown_time = (int(position), self.duration_str)
+        if shown_time != self.shown_time:
+            self.shown_time = shown_time
+            self.time_label.setText(f"{self.format_time(position)} / {self.duration_str}")
+        
+        if not self.seek_slider.isSliderDown():
+            self.seek_slider.setValue(int(position * 1000 / duration) if duration else 0)
 
     def slider_pressed(self):
         """Called when user starts dragging the slider"""
@@ -250,7 +323,8 @@ class MainWindow(QMainWindow):
 
     def slider_released(self):
         """Called when user releases the slider"""
-        self.position_timer.start()
+        if self.audio_player.is_playing():
+            self.position_timer.start()
 
     def seek_audio(self, value):
         """Seek to position in audio file"""
@@ -258,6 +332,7 @@ class MainWindow(QMainWindow):
             duration = self.audio_player.get_duration()
             position = (value / 1000) * duration
             self.audio_player.seek(position)
+            self.show_position(position)
 
     # File Management Methods
     def select_directory(self):
@@ -276,92 +351,266 @@ class MainWindow(QMainWindow):
             self.file_watcher.addPath(directory)
             self.refresh_files()
 
+    def queue_refresh(self, directory):
+        """Restart the rescan debounce timer"""
+        # A directory that never settles (e.g. a recorder writing into it)
+        # would keep pushing the rescan back; past WATCH_MAX_WAIT the timer
+        # is left to run out
+        if not self.watch_timer.isActive():
+            self.watch_elapsed.start()
+        elif self.watch_elapsed.elapsed() >= WATCH_MAX_WAIT:
+            return
+        self.watch_timer.start()
+
     def refresh_files(self):
-        """Refresh the file tree with audio files"""
+        """Rescan the directory in the background and rebuild the file tree"""
         if not self.directory:
             return
         
-        self.tree.clear()
-        audio_files = get_audio_files(self.directory)
+        # Coalesce refreshes requested while a scan is still running
+        if self.file_scanner and self.file_scanner.isRunning():
+            self.rescan_pending = True
+            return
         
-        # Build tree structure
-        year_items = {}
-        month_items = {}
-        day_items = {}
+        self.file_scanner = FileScanner(self.db, self.directory)
+        self.file_scanner.scanned.connect(self.on_files_scanned)
+        self.file_scanner.finished.connect(self.on_scan_finished)
+        self.file_scanner.start()
+
+    def on_scan_finished(self):
+        """Start another scan if one was requested in the meantime"""
+        if self.rescan_pending:
+            self.rescan_pending = False
+            self.refresh_files()
+
+    def on_files_scanned(self, directory, audio_files, completed):
+        """Bring the file tree in line with the results of a background scan"""
+        if directory != self.directory:
+            return
         
-        for file in audio_files:
-            timestamp = file['timestamp']
-            
-            # Create year node if needed
-            year = str(timestamp.year)
-            if year not in year_items:
-                year_item = QTreeWidgetItem(self.tree, [year])
-                year_items[year] = year_item
-                year_item.setExpanded(True)
-            
-            # Create month node if needed
-            month = timestamp.strftime('%B')
-            month_key = f"{year}-{month}"
-            if month_key not in month_items:
-                month_item = QTreeWidgetItem(year_items[year], [month])
-                month_items[month_key] = month_item
-                month_item.setExpanded(True)
-            
-            # Create day node if needed
-            day = str(timestamp.day)
-            day_key = f"{month_key}-{day}"
-            if day_key not in day_items:
-                day_item = QTreeWidgetItem(month_items[month_key], [day])
-                day_items[day_key] = day_item
-                day_item.setExpanded(True)
-            
-            # Add file entry
-            item = QTreeWidgetItem(day_items[day_key],
-                                 [file['filename'],
-                                  timestamp.strftime('%H:%M')])
-            item.setData(0, Qt.ItemDataRole.UserRole, file['path'])
+        # Search results stay put; the tree is caught up once they're closed
+        if self.stashed_items is not None and directory == self.tree_directory:
+            return
+        
+        self.tree.setUpdatesEnabled(False)
+        
+        # Start over when the tree shows another directory or search results
+        if self.tree_directory != directory:
+            self.clear_tree()
+            self.tree_directory = directory
+        
+        for path in self.file_items.keys() - set(audio_files.paths):
+            self.remove_file_item(path)
+        
+        self.tree.setUpdatesEnabled(True)
+        
+        # Large directories are added a chunk at a time so the window stays
+        # responsive; a newer scan simply replaces the pending rows
+        self.pending_rows = zip(*audio_files)
+        self.pending_completed = completed
+        self.populate_tree()
+
+    def populate_tree(self):
+        """Add or update the next chunk of scanned files in the tree"""
+        self.populate_scheduled = False
+        if self.pending_rows is None:
+            return
+        
+        self.tree.setUpdatesEnabled(False)
+        count = 0
+        for path, filename, timestamp in islice(self.pending_rows, TREE_CHUNK):
+            count += 1
+            item = self.file_items.get(path)
+            if item is None:
+                item = self.add_file_item(path, filename, timestamp)
             
             # Check if transcription exists
-            if self.db.get_transcription(file['path']):
+            if path in self.pending_completed:
                 item.setForeground(0, Qt.GlobalColor.blue)
+            else:
+                item.setData(0, Qt.ItemDataRole.ForegroundRole, None)
+        self.tree.setUpdatesEnabled(True)
+        
+        if count < TREE_CHUNK:
+            self.pending_rows = None
+        elif not self.populate_scheduled:
+            self.populate_scheduled = True
+            QTimer.singleShot(0, self.populate_tree)
+
+    def clear_tree(self):
+        """Remove all items from the file tree"""
+        self.tree.clear()
+        self.tree_directory = None
+        self.pending_rows = None
+        self.stashed_items = None
+        self.stashed_expanded = []
+        self.file_items.clear()
+        self.year_items.clear()
+        self.month_items.clear()
+        self.day_items.clear()
+
+    def insert_sorted(self, parent, item, key):
+        """Insert item under parent (None for top level), keeping newest first"""
+        if parent is None:
+            count, child = self.tree.topLevelItemCount(), self.tree.topLevelItem
+        else:
+            count, child = parent.childCount(), parent.child
+        
+        # Scans arrive newest first, so most items belong at the end;
+        # anything else is placed by a binary search over the keys
+        if count == 0 or child(count - 1).data(0, SORT_ROLE) > key:
+            index = count
+        else:
+            low, index = 0, count - 1
+            while low < index:
+                middle = (low + index) // 2
+                if child(middle).data(0, SORT_ROLE) > key:
+                    low = middle + 1
+                else:
+                    index = middle
+
+        item.setData(0, SORT_ROLE, key)
+        if parent is None:
+            self.tree.insertTopLevelItem(index, item)
+        else:
+            parent.insertChild(index, item)
+
+    def add_file_item(self, path, filename, timestamp):
+        """Add a file to the tree, creating its year/month/day nodes if needed"""
+        year_key = timestamp.year
+        month_key = (year_key, timestamp.month)
+        day_key = month_key + (timestamp.day,)
+        
+        # Create year node if needed
+        if year_key not in self.year_items:
+            year_item = QTreeWidgetItem([str(timestamp.year)])
+            self.insert_sorted(None, year_item, timestamp.year)
+            year_item.setExpanded(True)
+            self.year_items[year_key] = year_item
+        
+        # Create month node if needed
+        if month_key not in self.month_items:
+            month_item = QTreeWidgetItem([timestamp.strftime('%B')])
+            self.insert_sorted(self.year_items[year_key], month_item, timestamp.month)
+            month_item.setExpanded(True)
+            self.month_items[month_key] = month_item
+        
+        # Create day node if needed
+        if day_key not in self.day_items:
+            day_item = QTreeWidgetItem([str(timestamp.day)])
+            self.insert_sorted(self.month_items[month_key], day_item, timestamp.day)
+            day_item.setExpanded(True)
+            self.day_items[day_key] = day_item
+        
+        # Add file entry
+        item = QTreeWidgetItem([filename, timestamp.strftime('%H:%M')])
+        item.setData(0, Qt.ItemDataRole.UserRole, path)
+        self.insert_sorted(self.day_items[day_key], item,
+                           timestamp.hour * 60 + timestamp.minute)
+        self.file_items[path] = item
+        return item
+
+    def remove_file_item(self, path):
+        """Remove a file from the tree along with any nodes left empty"""
+        item = self.file_items.pop(path)
+        day_item = item.parent()
+        month_item = day_item.parent()
+        year_item = month_item.parent()
+        year = year_item.data(0, SORT_ROLE)
+        month = month_item.data(0, SORT_ROLE)
+        day = day_item.data(0, SORT_ROLE)
+        
+        day_item.removeChild(item)
+        if day_item.childCount() == 0:
+            month_item.removeChild(day_item)
+            del self.day_items[(year, month, day)]
+        if month_item.childCount() == 0:
+            year_item.removeChild(month_item)
+            del self.month_items[(year, month)]
+        if year_item.childCount() == 0:
+            self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(year_item))
+            del self.year_items[year]
 
     # Transcription Methods
-    def transcribe_audio(self):
-        """Transcribe selected audio file"""
+    def current_path(self):
+        """Return the file path of the tree's current item, if it is a file"""
         item = self.tree.currentItem()
-        if not item:
+        return item.data(0, Qt.ItemDataRole.UserRole) if item else None
+
+    def transcribe_audio(self):
+        """Transcribe the selected audio files"""
+        file_paths = [item.data(0, Qt.ItemDataRole.UserRole)
+                      for item in self.tree.selectedItems()]
+        file_paths = [path for path in file_paths if path]
+        if not file_paths:
             return
         
-        file_path = item.data(0, Qt.ItemDataRole.UserRole)
-        if not file_path:
+        # Files picked while a transcription runs join its queue, so the
+        # loaded model goes straight on to them
+        if self.current_transcription and self.current_transcription.add_files(file_paths):
+            self.statusBar().showMessage(
+                f"Queued {len(file_paths)} file(s) for transcription", 3000)
             return
         
-        self.transcribe_button.setEnabled(False)
+        # A worker that closed its queue is only returning from run(); let it
+        # get there so dropping the last reference can't destroy a running thread
+        if self.current_transcription:
+            self.current_transcription.wait()
+        
         self.progress.setValue(0)
         self.progress.show()
-        self.transcription_text.setText("Transcribing... This may take a few minutes.")
+        if self.current_path() in file_paths:
+            self.transcription_text.setText("Transcribing... This may take a few minutes.")
         
-        self.current_transcription = TranscriptionWorker(self.model, file_path)
+        batch_size = self.settings.value('batch_size', 8, type=int)
+        self.current_transcription = TranscriptionWorker(self.model, self.db,
+                                                         file_paths, batch_size)
         self.current_transcription.finished.connect(self.on_transcription_complete)
         self.current_transcription.error.connect(self.on_transcription_error)
-        self.current_transcription.progress.connect(self.progress.setValue)
+        self.current_transcription.progress.connect(self.on_transcription_progress)
+        self.current_transcription.file_started.connect(self.on_transcription_started)
+        self.current_transcription.done.connect(self.on_transcriptions_done)
         self.current_transcription.start()
 
+    def on_transcription_progress(self, value):
+        """Move the progress bar, ignoring a superseded worker's last updates"""
+        if self.sender() is self.current_transcription:
+            self.progress.setValue(value)
+
+    def on_transcription_started(self, number, count):
+        """Show which of the queued files is being transcribed"""
+        if self.sender() is self.current_transcription:
+            self.statusBar().showMessage(f"Transcribing file {number} of {count}")
+
     def on_transcription_complete(self, file_path, transcript):
-        """Handle completed transcription"""
-        self.transcription_text.setText(transcript)
-        self.db.add_transcription(file_path, transcript)
-        self.progress.hide()
-        self.transcribe_button.setEnabled(True)
-        self.statusBar().showMessage("Transcription completed", 3000)
-        self.refresh_files()
+        """Handle a completed transcription"""
+        # Queued files finish one by one; the pane keeps showing the file
+        # the user is looking at
+        if file_path == self.current_path():
+            self.transcription_text.setText(transcript)
+        
+        # The worker has stored it already; only this file's row changes.
+        # Rows still waiting to be added are coloured from the same set.
+        self.pending_completed.add(file_path)
+        item = self.file_items.get(file_path)
+        if item is not None:
+            item.setForeground(0, Qt.GlobalColor.blue)
 
     def on_transcription_error(self, error):
         """Handle transcription error"""
         self.transcription_text.setText(f"Error during transcription: {error}")
+
+    def on_transcriptions_done(self, failed):
+        """Handle the worker running out of files to transcribe"""
+        # A worker that had already finished may report after its successor started
+        if self.sender() is not self.current_transcription:
+            return
+        
         self.progress.hide()
-        self.transcribe_button.setEnabled(True)
-        self.statusBar().showMessage("Transcription failed", 3000)
+        if failed:
+            self.statusBar().showMessage("Transcription failed", 3000)
+        else:
+            self.statusBar().showMessage("Transcription completed", 3000)
 
     def save_transcription(self):
         """Save transcription to file"""
@@ -396,26 +645,64 @@ class MainWindow(QMainWindow):
                                    f"Could not save transcription: {str(e)}")
 
     # Search Methods
+    def queue_search(self, query):
+        """Restart the search debounce timer"""
+        self.search_timer.start()
+
+    def run_search(self):
+        """Search for the text left in the search bar"""
+        self.search_transcripts(self.search_bar.text())
+
     def search_transcripts(self, query):
         """Search through transcriptions"""
         if len(query) < 3:  # Only search for queries with 3+ characters
-            self.refresh_files()
+            self.restore_tree()
             return
         
         results = self.db.search_transcripts(query)
-        self.tree.clear()
         
-        for file_path, transcript in results:
+        self.tree.setUpdatesEnabled(False)
+        if self.stashed_items is None:
+            # Set the directory tree aside so it comes back without a rebuild
+            self.pending_rows = None
+            self.stashed_expanded = [item for item in chain(self.year_items.values(),
+                                                            self.month_items.values(),
+                                                            self.day_items.values())
+                                     if item.isExpanded()]
+            self.stashed_items = [self.tree.takeTopLevelItem(0)
+                                  for _ in range(self.tree.topLevelItemCount())]
+        else:
+            self.tree.clear()
+        
+        for file_path, snippet in results:
             item = QTreeWidgetItem(self.tree)
             item.setText(0, os.path.basename(file_path))
-            item.setText(1, transcript[:100] + "...")  # Show preview
+            item.setText(1, snippet)  # Show matching excerpt
             item.setData(0, Qt.ItemDataRole.UserRole, file_path)
             item.setForeground(0, Qt.GlobalColor.blue)
+        self.tree.setUpdatesEnabled(True)
+
+    def restore_tree(self):
+        """Replace search results with the directory tree they replaced"""
+        if self.stashed_items is None:
+            return
+        
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        self.tree.addTopLevelItems(self.stashed_items)
+        for item in self.stashed_expanded:
+            item.setExpanded(True)
+        self.stashed_items = None
+        self.stashed_expanded = []
+        self.tree.setUpdatesEnabled(True)
+        
+        # Pick up whatever changed in the directory in the meantime
+        self.refresh_files()
 
     # Model and Settings Methods
     def load_model(self):
         """Load the Whisper model"""
-        self.model = whisper.load_model("base")
+        self.model = get_model()
 
     def on_model_loaded(self):
         """Handle model loading completion"""
@@ -445,6 +732,12 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         
+        # Scans and loads are short; let them finish rather than destroy running threads
+        if self.file_scanner and self.file_scanner.isRunning():
+            self.file_scanner.wait()
+        if self.audio_loader and self.audio_loader.isRunning():
+            self.audio_loader.wait()
+        
         # Stop audio if playing
         if self.audio_player:
             if self.is_playing:
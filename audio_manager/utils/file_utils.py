@@ -1,33 +1,69 @@
-from datetime import datetime
-from pathlib import Path
-
-def parse_audio_filename(filename):
-    """Parse filename in format YYMMDD_HHMM"""
-    try:
-        date_str = filename[:6]
-        time_str = filename[7:11]
-        
-        year = f"20{date_str[:2]}"
-        month = date_str[2:4]
-        day = date_str[4:6]
-        hour = time_str[:2]
-        minute = time_str[2:4]
-        
-        return datetime(int(year), int(month), int(day), 
-                       int(hour), int(minute))
-    except (ValueError, IndexError):
-        return None
+import os
+from collections import namedtuple
+
+import numpy as np
+
+# Scan results as parallel columns, newest first
+AudioIndex = namedtuple('AudioIndex', 'paths names timestamps')
+
+# Positions of the digits in YYMMDD_HHMM
+_DIGIT_COLUMNS = [0, 1, 2, 3, 4, 5, 7, 8, 9, 10]
+
+def parse_audio_filenames(names):
+    """
+    Parse filenames in format YYMMDD_HHMM, all at once.
+
+    Only names whose first 11 characters are ASCII digits in that layout and
+    a real date and time count as parsed.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: datetime64[m] timestamps of the names
+        that parse, and the boolean mask selecting those names
+    """
+    # Fixed-width unicode keeps the 11 characters that matter and pads
+    # shorter names with NULs, which then fail the digit check
+    codes = np.array(names, dtype='U11').view(np.uint32).reshape(len(names), 11)
+    valid = ((codes[:, _DIGIT_COLUMNS] - 48) < 10).all(axis=1) & (codes[:, 6] == 95)
+    
+    d = codes[valid].astype(np.int64) - 48
+    month, day = d[:, 2] * 10 + d[:, 3], d[:, 4] * 10 + d[:, 5]
+    hour, minute = d[:, 7] * 10 + d[:, 8], d[:, 9] * 10 + d[:, 10]
+    
+    # Months since 1970, then days on top; a day past the end of its month
+    # rolls into the next one, which is how e.g. Feb 30 is caught
+    months = ((d[:, 0] * 10 + d[:, 1] + 30) * 12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1)
+    real = ((month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60)
+            & (days.astype('datetime64[M]') == months))
+    
+    valid[np.flatnonzero(valid)[~real]] = False
+    stamps = days.astype('datetime64[m]') + (hour * 60 + minute)
+    return stamps[real], valid
+
+def iter_audio_files(directory):
+    """Yield (path, filename) for each .mp3 file in directory, in directory order"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith('.mp3') and entry.is_file():
+                yield entry.path, entry.name
 
 def get_audio_files(directory):
-    """Get list of audio files with timestamps"""
-    files = []
-    for file in Path(directory).glob('*.mp3'):
-        timestamp = parse_audio_filename(file.stem)
-        if timestamp:
-            files.append({
-                'path': str(file),
-                'filename': file.name,
-                'timestamp': timestamp
-            })
+    """Get an AudioIndex of audio files with timestamps, newest first"""
+    paths, names = [], []
+    for path, name in iter_audio_files(directory):
+        paths.append(path)
+        names.append(name)
+    
+    # Parse every name in one vectorised pass. The extension can stand in
+    # for the end of the name: a stem shorter than 11 characters puts its
+    # '.' where a digit or the '_' is expected
+    stamps, valid = parse_audio_filenames(names)
+    rows = np.flatnonzero(valid)
     
-    return sorted(files, key=lambda x: x['timestamp'], reverse=True)
\ No newline at end of file
+    # A stable sort of the negated minutes keeps equal timestamps in
+    # directory order, like sorted(..., reverse=True)
+    order = np.argsort(-stamps.view(np.int64), kind='stable')
+    rows = rows[order].tolist()
+    return AudioIndex([paths[i] for i in rows],
+                      [names[i] for i in rows],
+                      stamps[order].astype(object).tolist())
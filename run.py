@@ -1,17 +1,14 @@
 import sys
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-from audio_manager.ui.main_window import MainWindow
-from audio_manager.ui.styles import MAIN_STYLE
 
 def main():
-    if hasattr(Qt, 'AA_EnableHighDpiScaling'):
-        QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
-    if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
-        QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
-    
+    # High DPI scaling is always on in Qt 6
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    
+    # Import the application modules once Qt is initialised
+    from audio_manager.ui.main_window import MainWindow
+    from audio_manager.ui.styles import MAIN_STYLE
     app.setStyleSheet(MAIN_STYLE)
     
     window = MainWindow()
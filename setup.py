@@ -1,15 +1,19 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 setup(
     name="audio_manager",
     version="0.1",
-    packages=find_packages(),
+    # Listed explicitly so builds don't walk the source tree
+    packages=['audio_manager', 'audio_manager.ui', 'audio_manager.utils'],
+    py_modules=['run'],
     install_requires=[
         'PyQt6>=6.4.0',
         'soundfile>=0.10.3',
         'sounddevice>=0.4.3',
+        'soxr>=0.5.0',
         'numpy>=1.21.0',
-        'openai-whisper>=20231117'
+        'numba>=0.57.0',
+        'faster-whisper>=1.1.0'
     ],
     entry_points={
         'console_scripts': [